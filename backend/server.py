@@ -1,22 +1,75 @@
 from fastapi import FastAPI, APIRouter, UploadFile, File, Form, HTTPException
+from fastapi.responses import ORJSONResponse, StreamingResponse
 from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
+import asyncio
 import os
 import logging
+import hashlib
+import multiprocessing
+import threading
+import json
+import re
+import shutil
+import subprocess
+import time
+import uuid
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import asynccontextmanager
+from lxml import etree
 from pathlib import Path
 from pydantic import BaseModel
-from typing import List
-import PyPDF2
+from typing import IO, List
+import fitz  # PyMuPDF
 import docx
-import io
 from emergentintegrations.llm.chat import LlmChat, UserMessage
 
 # Load env
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / ".env")
 
+# Chats
+SYSTEM_MESSAGE = (
+    "You are a professional recruiter. "
+    "Generate ATS-friendly resume bullets, a concise cover letter, "
+    "and a short application email."
+)
+BATCH_SYSTEM_MESSAGE = (
+    "You are a professional recruiter. "
+    "Generate ATS-friendly resume bullets, a concise cover letter, "
+    "and a short application email for each item."
+)
+
+def build_chat(session_id_prefix: str, system_message: str):
+    """Build a chat for one request.
+
+    LlmChat is session-scoped and may accumulate conversation history,
+    so instances must not be shared across requests (or tasks): a fresh
+    chat with a unique session_id keeps every request's resume out of
+    everyone else's context. The instance itself is cheap; the LLM round
+    trip dominates.
+    """
+    return (
+        LlmChat(
+            api_key=app.state.llm_api_key,
+            session_id=f"{session_id_prefix}-{uuid.uuid4()}",
+            system_message=system_message,
+        )
+        .with_model("anthropic", "claude-sonnet-4-5-20250929")
+    )
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Fail fast at boot on missing config instead of 500ing per request.
+    api_key = os.getenv("EMERGENT_LLM_KEY")
+    if not api_key:
+        raise RuntimeError("EMERGENT_LLM_KEY not set; refusing to start")
+    app.state.llm_api_key = api_key
+    yield
+
 # App
-app = FastAPI()
+app = FastAPI(lifespan=lifespan, default_response_class=ORJSONResponse)
 api_router = APIRouter(prefix="/api")
 
 # Logger
@@ -30,46 +83,205 @@ class TailorResponse(BaseModel):
     application_email: str
 
 # Helpers
-def extract_text_from_pdf(file_content: bytes) -> str:
+PDFTOTEXT = shutil.which("pdftotext")
+PDFTOTEXT_TIMEOUT_SECONDS = 15
+
+MAX_UPLOAD_BYTES = 5 * 1024 * 1024
+MAX_RESUME_CHARS = 8000
+
+# Text-only collection: no image extraction or mediabox clipping work,
+# since graphics content never contributes to resume text.
+FITZ_TEXT_FLAGS = fitz.TEXT_PRESERVE_LIGATURES | fitz.TEXT_PRESERVE_WHITESPACE
+
+# Below this page count spawn/pickle overhead beats the parallel win.
+PDF_PARALLEL_MIN_PAGES = 3
+_process_pool = None
+_process_pool_lock = threading.Lock()
+
+def _get_process_pool() -> ProcessPoolExecutor:
+    # Called from to_thread workers, so creation must be locked to avoid
+    # racing two pools into existence; spawn (not fork) because forking
+    # from a thread of a multithreaded server is deadlock-prone.
+    global _process_pool
+    with _process_pool_lock:
+        if _process_pool is None:
+            _process_pool = ProcessPoolExecutor(
+                max_workers=os.cpu_count(),
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+    return _process_pool
+
+def _extract_page(pdf_bytes: bytes, page_idx: int) -> str:
+    with fitz.open(stream=pdf_bytes, filetype="pdf") as doc:
+        return doc[page_idx].get_text("text", flags=FITZ_TEXT_FLAGS)
+
+def extract_text_from_pdf(fp: IO[bytes]) -> str:
+    # Prefer poppler's pdftotext when installed; it is faster than any
+    # in-process Python path. Fall back to PyMuPDF otherwise.
+    if PDFTOTEXT:
+        try:
+            proc = subprocess.run(
+                [PDFTOTEXT, "-layout", "-", "-"],
+                stdin=fp,
+                capture_output=True,
+                timeout=PDFTOTEXT_TIMEOUT_SECONDS,
+            )
+            if proc.returncode == 0:
+                return proc.stdout.decode("utf-8", errors="replace")
+        except Exception as e:
+            # Binary gone since import, fp without a usable fileno, or a
+            # pathological PDF hitting the timeout — use the in-process
+            # path rather than 500ing or hanging the request.
+            logger.warning("pdftotext failed, falling back to PyMuPDF: %s", e)
+        fp.seek(0)
+    data = fp.read()
     try:
-        reader = PyPDF2.PdfReader(io.BytesIO(file_content))
-        return "\n".join(page.extract_text() or "" for page in reader.pages)
+        with fitz.open(stream=data, filetype="pdf") as doc:
+            n_pages = doc.page_count
+            if n_pages < PDF_PARALLEL_MIN_PAGES:
+                # List-comp (not genexpr): str.join pre-sizes from a list.
+                return "\n".join(
+                    [page.get_text("text", flags=FITZ_TEXT_FLAGS) for page in doc]
+                )
+        # Pages are independent content streams; fan them out across
+        # worker processes for larger documents.
+        pool = _get_process_pool()
+        return "\n".join(
+            pool.map(_extract_page, [data] * n_pages, range(n_pages))
+        )
     except Exception as e:
         raise HTTPException(status_code=400, detail=f"PDF read error: {e}")
 
-def extract_text_from_docx(file_content: bytes) -> str:
+DOCX_TEXT_TAG = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}t"
+
+def extract_text_from_docx(fp: IO[bytes]) -> str:
+    # DOCX is a ZIP; iterparse <w:t> runs straight out of
+    # word/document.xml instead of building python-docx's full object
+    # tree (styles, numbering, relationships) just to read text.
     try:
-        doc = docx.Document(io.BytesIO(file_content))
-        return "\n".join(p.text for p in doc.paragraphs)
+        with zipfile.ZipFile(fp) as z, z.open("word/document.xml") as doc_xml:
+            texts = []
+            for _, el in etree.iterparse(doc_xml, tag=DOCX_TEXT_TAG):
+                if el.text:
+                    texts.append(el.text)
+                el.clear()
+            return "\n".join(texts)
+    except KeyError:
+        # Non-standard part name; let python-docx resolve the main part,
+        # but query <w:t> nodes via XPath instead of walking the
+        # Paragraph object model (skips wrapping every <w:p> and run).
+        fp.seek(0)
+        try:
+            doc = docx.Document(fp)
+            nodes = doc.element.body.xpath(".//w:t")
+            return "\n".join([t.text for t in nodes if t.text])
+        except Exception as e:
+            raise HTTPException(status_code=400, detail=f"DOCX read error: {e}")
     except Exception as e:
         raise HTTPException(status_code=400, detail=f"DOCX read error: {e}")
 
-async def generate_tailored_content(resume_text: str, job_description: str) -> TailorResponse:
-    api_key = os.getenv("EMERGENT_LLM_KEY")
-    if not api_key:
-        raise HTTPException(status_code=500, detail="EMERGENT_LLM_KEY not set")
+BATCH_ITEM_DELIM = "===ITEM {n}==="
+MAX_BATCH_ITEMS = 5
 
-    chat = (
-        LlmChat(
-            api_key=api_key,
-            session_id="applymate",
-            system_message=(
-                "You are a professional recruiter. "
-                "Generate ATS-friendly resume bullets, a concise cover letter, "
-                "and a short application email."
-            ),
-        )
-        .with_model("anthropic", "claude-sonnet-4-5-20250929")
+# Cap concurrent outbound LLM calls so a burst of requests overlaps
+# network wait without tripping the provider's rate limits.
+LLM_SEMAPHORE = asyncio.Semaphore(int(os.getenv("LLM_CONCURRENCY", "10")))
+
+# Users iterate on the same resume/JD pair; identical inputs produce the
+# cached answer instead of another multi-second paid LLM call.
+CACHE_TTL_SECONDS = 24 * 60 * 60
+CACHE_MAX_ENTRIES = 1024
+_response_cache: dict = {}
+
+def _cache_key(resume_text: str, job_description: str) -> str:
+    return hashlib.sha256(
+        (resume_text + "\x00" + job_description).encode()
+    ).hexdigest()
+
+def _cache_get(key: str):
+    entry = _response_cache.get(key)
+    if entry is None:
+        return None
+    expires_at, cached = entry
+    if expires_at < time.monotonic():
+        del _response_cache[key]
+        return None
+    return cached
+
+def _cache_put(key: str, result: TailorResponse) -> None:
+    if len(_response_cache) >= CACHE_MAX_ENTRIES:
+        now = time.monotonic()
+        for stale in [k for k, (exp, _) in _response_cache.items() if exp < now]:
+            del _response_cache[stale]
+        if len(_response_cache) >= CACHE_MAX_ENTRIES:
+            _response_cache.clear()
+    _response_cache[key] = (time.monotonic() + CACHE_TTL_SECONDS, result)
+
+# Static prompt segments, rendered once at import; build_prompt only
+# joins them around the two variable fields.
+PROMPT_HEAD = "\nRESUME:\n"
+PROMPT_MID = "\n\nJOB DESCRIPTION:\n"
+PROMPT_TAIL = """
+
+Format exactly:
+
+RESUME BULLETS:
+- bullet
+
+COVER LETTER:
+text
+
+APPLICATION EMAIL:
+text
+"""
+
+def build_prompt(resume_text: str, job_description: str) -> str:
+    return "".join(
+        [PROMPT_HEAD, resume_text, PROMPT_MID, job_description, PROMPT_TAIL]
     )
 
-    prompt = f"""
+async def generate_tailored_content(resume_text: str, job_description: str) -> TailorResponse:
+    cache_key = _cache_key(resume_text, job_description)
+    cached = _cache_get(cache_key)
+    if cached is not None:
+        return cached
+
+    chat = build_chat("applymate", SYSTEM_MESSAGE)
+    prompt = build_prompt(resume_text, job_description)
+
+    async with LLM_SEMAPHORE:
+        response = await chat.send_message(UserMessage(text=prompt))
+    result = parse_ai_response(response)
+    # Never cache a failed parse: one transient bad completion must not
+    # be replayed for this pair for the whole TTL.
+    if not is_generation_failure(result):
+        _cache_put(cache_key, result)
+    return result
+
+async def generate_tailored_content_batch(
+    items: List[tuple],
+) -> List[TailorResponse]:
+    """Tailor several (resume_text, job_description) pairs in one LLM call.
+
+    Marshals the items into a single delimited prompt so the batch pays
+    one network round trip instead of len(items).
+    """
+    chat = build_chat("applymate-batch", BATCH_SYSTEM_MESSAGE)
+
+    sections = []
+    for n, (resume_text, job_description) in enumerate(items, 1):
+        sections.append(f"""
+{BATCH_ITEM_DELIM.format(n=n)}
 RESUME:
 {resume_text}
 
 JOB DESCRIPTION:
 {job_description}
+""")
 
-Format exactly:
+    prompt = "\n".join(sections) + """
+For EACH item above, repeat its ===ITEM N=== delimiter line and then
+answer in this exact format:
 
 RESUME BULLETS:
 - bullet
@@ -81,29 +293,53 @@ APPLICATION EMAIL:
 text
 """
 
-    response = await chat.send_message(UserMessage(text=prompt))
-    return parse_ai_response(response)
+    async with LLM_SEMAPHORE:
+        response = await chat.send_message(UserMessage(text=prompt))
+
+    results = []
+    for n in range(1, len(items) + 1):
+        delim = BATCH_ITEM_DELIM.format(n=n)
+        chunk = response.split(delim, 1)[-1]
+        next_delim = BATCH_ITEM_DELIM.format(n=n + 1)
+        if next_delim in chunk:
+            chunk = chunk.split(next_delim, 1)[0]
+        results.append(parse_ai_response(chunk))
+    return results
+
+# One DOTALL pass over the response instead of three .split() copies.
+PARSE_RE = re.compile(
+    r"RESUME BULLETS:\s*(?P<bullets>.*?)"
+    r"COVER LETTER:\s*(?P<cover>.*?)"
+    r"APPLICATION EMAIL:\s*(?P<email>.*)",
+    re.DOTALL,
+)
+BULLET_RE = re.compile(r"^\s*[-•]\s*(.+)$", re.MULTILINE)
+
+GENERATION_FAILED = "Generation failed"
+
+def is_generation_failure(result: TailorResponse) -> bool:
+    """True when any field fell back to the parse-failure sentinel."""
+    return (
+        result.resume_bullets == [GENERATION_FAILED]
+        or result.cover_letter == GENERATION_FAILED
+        or result.application_email == GENERATION_FAILED
+    )
 
 def parse_ai_response(response: str) -> TailorResponse:
     bullets, cover, email = [], "", ""
 
-    if "RESUME BULLETS:" in response:
-        after = response.split("RESUME BULLETS:", 1)[1]
-        resume_part, rest = after.split("COVER LETTER:", 1)
-        cover_part, email_part = rest.split("APPLICATION EMAIL:", 1)
-
-        bullets = [
-            line.lstrip("-• ").strip()
-            for line in resume_part.splitlines()
-            if line.strip().startswith(("-", "•"))
-        ]
-        cover = cover_part.strip()
-        email = email_part.strip()
-
-    return TailorResponse(
-        resume_bullets=bullets or ["Generation failed"],
-        cover_letter=cover or "Generation failed",
-        application_email=email or "Generation failed",
+    match = PARSE_RE.search(response)
+    if match:
+        bullets = [b.strip() for b in BULLET_RE.findall(match.group("bullets"))]
+        cover = match.group("cover").strip()
+        email = match.group("email").strip()
+
+    # model_construct: the fields are strings we just built, so skip
+    # pydantic's validation pass on every response.
+    return TailorResponse.model_construct(
+        resume_bullets=bullets or [GENERATION_FAILED],
+        cover_letter=cover or GENERATION_FAILED,
+        application_email=email or GENERATION_FAILED,
     )
 
 # Routes
@@ -111,36 +347,151 @@ def parse_ai_response(response: str) -> TailorResponse:
 async def root():
     return {"message": "ApplyMate API"}
 
-@api_router.post("/tailor-application", response_model=TailorResponse)
-async def tailor_application(
-    resume: UploadFile = File(...),
-    job_description: str = Form(...)
-):
+async def read_resume_text(resume: UploadFile) -> str:
+    """Validate an uploaded resume and return its extracted text."""
     if not resume.filename:
         raise HTTPException(status_code=400, detail="No resume uploaded")
 
-    ext = resume.filename.lower().split(".")[-1]
-    if ext not in {"pdf", "docx"}:
+    # Reject oversize uploads before any parsing work happens.
+    size = resume.size or int(resume.headers.get("content-length") or 0)
+    if size > MAX_UPLOAD_BYTES:
+        raise HTTPException(status_code=413, detail="Resume larger than 5 MB")
+
+    # Sniff the magic bytes rather than trusting the extension, so a
+    # mislabeled file is rejected here instead of deep in a parser.
+    resume.file.seek(0)
+    magic = resume.file.read(4)
+    if magic.startswith(b"%PDF"):
+        ext = "pdf"
+    elif magic == b"PK\x03\x04":
+        # ZIP container — DOCX, as far as the extractor is concerned;
+        # the extension stays a hint only.
+        ext = "docx"
+    else:
         raise HTTPException(status_code=400, detail="Only PDF or DOCX allowed")
 
-    file_bytes = await resume.read()
-    resume_text = (
-        extract_text_from_pdf(file_bytes)
-        if ext == "pdf"
-        else extract_text_from_docx(file_bytes)
-    )
+    # Hand the spooled upload straight to the extractor instead of
+    # copying it into a bytes object first.
+    resume.file.seek(0)
+    # Parsing is CPU-bound C work; run it off the event loop so other
+    # requests keep being served while a resume is extracted.
+    extract = extract_text_from_pdf if ext == "pdf" else extract_text_from_docx
+    resume_text = await asyncio.to_thread(extract, resume.file)
 
     if not resume_text.strip():
         raise HTTPException(status_code=400, detail="Resume text empty")
 
+    # Cap what reaches the prompt; token count drives LLM latency and cost.
+    if len(resume_text) > MAX_RESUME_CHARS:
+        logger.info(
+            "Truncating resume text from %d to %d chars",
+            len(resume_text),
+            MAX_RESUME_CHARS,
+        )
+        resume_text = resume_text[:MAX_RESUME_CHARS]
+    return resume_text
+
+def clean_job_description(job_description: str) -> str:
     clean_jd = job_description.strip()
     if len(clean_jd) < 50:
         raise HTTPException(
             status_code=400,
             detail="Job description must be at least 50 characters",
         )
+    return clean_jd
+
+@api_router.post("/tailor-application", response_model=TailorResponse)
+async def tailor_application(
+    resume: UploadFile = File(...),
+    job_description: str = Form(...)
+):
+    resume_text = await read_resume_text(resume)
+    clean_jd = clean_job_description(job_description)
+    result = await generate_tailored_content(resume_text, clean_jd)
+    # Returning a Response bypasses FastAPI's response-model
+    # re-validation and jsonable_encoder pass; response_model above
+    # still documents the schema.
+    return ORJSONResponse(result.model_dump())
+
+def _sse(payload: dict) -> str:
+    return f"data: {json.dumps(payload)}\n\n"
+
+@api_router.post("/tailor-application/stream")
+async def tailor_application_stream(
+    resume: UploadFile = File(...),
+    job_description: str = Form(...)
+):
+    """Like /tailor-application, but streams LLM output as SSE.
+
+    Emits {"delta": ...} events as text arrives and a final
+    {"done": <TailorResponse>} event, so clients can render tokens
+    after time-to-first-token instead of waiting for the full
+    completion.
+    """
+    resume_text = await read_resume_text(resume)
+    clean_jd = clean_job_description(job_description)
+
+    chat = build_chat("applymate", SYSTEM_MESSAGE)
+    cache_key = _cache_key(resume_text, clean_jd)
+    prompt = build_prompt(resume_text, clean_jd)
+
+    async def event_stream():
+        cached = _cache_get(cache_key)
+        if cached is not None:
+            yield _sse({"done": cached.model_dump()})
+            return
+
+        # The 200 and headers are already on the wire by the time this
+        # body runs, so failures must surface as a terminal SSE event —
+        # otherwise clients just see a silently truncated stream.
+        try:
+            parts = []
+            stream_message = getattr(chat, "stream_message", None)
+            async with LLM_SEMAPHORE:
+                if stream_message is not None:
+                    async for chunk in stream_message(UserMessage(text=prompt)):
+                        text = chunk if isinstance(chunk, str) else getattr(chunk, "text", "")
+                        if text:
+                            parts.append(text)
+                            yield _sse({"delta": text})
+                else:
+                    # SDK build without token streaming: single final event.
+                    parts.append(await chat.send_message(UserMessage(text=prompt)))
+
+            result = parse_ai_response("".join(parts))
+            if not is_generation_failure(result):
+                _cache_put(cache_key, result)
+            yield _sse({"done": result.model_dump()})
+        except Exception as e:
+            logger.exception("Tailoring stream failed")
+            yield _sse({"error": str(e)})
+
+    return StreamingResponse(event_stream(), media_type="text/event-stream")
+
+@api_router.post("/tailor-batch", response_model=List[TailorResponse])
+async def tailor_batch(
+    resumes: List[UploadFile] = File(...),
+    job_descriptions: List[str] = Form(...),
+):
+    if len(resumes) != len(job_descriptions):
+        raise HTTPException(
+            status_code=400,
+            detail="Each resume needs a matching job description",
+        )
+    if not resumes:
+        raise HTTPException(status_code=400, detail="No resumes uploaded")
+    if len(resumes) > MAX_BATCH_ITEMS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"At most {MAX_BATCH_ITEMS} items per batch",
+        )
 
-    return await generate_tailored_content(resume_text, clean_jd)
+    items = [
+        (await read_resume_text(resume), clean_job_description(jd))
+        for resume, jd in zip(resumes, job_descriptions)
+    ]
+    results = await generate_tailored_content_batch(items)
+    return ORJSONResponse([r.model_dump() for r in results])
 
 # Middleware
 app.include_router(api_router)